@@ -1,16 +1,27 @@
 from __future__ import annotations
 
 import asyncio
+import hashlib
 import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager
 from dataclasses import dataclass, field
-from datetime import datetime, timedelta
-from typing import Any, Dict, List, Optional
+from datetime import date, datetime, timedelta
+from typing import Any, AsyncIterator, Dict, List, Optional, Set
+from urllib.parse import urljoin
 
+import httpx
+from async_timeout import timeout
+from selectolax.parser import HTMLParser
 from playwright.async_api import TimeoutError as PlaywrightTimeoutError
 from playwright.async_api import async_playwright
 
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import FileResponse
+from fastapi import FastAPI, HTTPException, Query, WebSocket, WebSocketDisconnect
+from fastapi.responses import ORJSONResponse, Response
 from fastapi.staticfiles import StaticFiles
 from pydantic import BaseModel, Field
 
@@ -26,89 +37,400 @@ class OtpRequest(BaseModel):
     otp: str = Field(..., min_length=4, max_length=12)
 
 
+@dataclass(frozen=True)
+class Snapshot:
+    """任务状态的不可变快照，更新时整体替换，读取无需加锁。"""
+
+    status: str
+    msg: str
+    ts: float = field(default_factory=time.monotonic)
+
+    def to_dict(self) -> Dict[str, Any]:
+        age_ms = int((time.monotonic() - self.ts) * 1000)
+        return {"status": self.status, "msg": self.msg, "age_ms": age_ms}
+
+
 @dataclass
-class TaskState:
-    status: str = "idle"
-    msg: str = "等待任务启动"
+class JobRecord:
+    """任务运行期间的可变数据，与 Snapshot 使用同一个任务 id。"""
+
     result_markdown: str = ""
-    last_update: datetime = field(default_factory=datetime.utcnow)
     otp_event: asyncio.Event = field(default_factory=asyncio.Event)
     otp_value: Optional[str] = None
-    task: Optional[asyncio.Task] = None
+    subscribers: Set[asyncio.Queue] = field(default_factory=set)
+
+
+jobs: Dict[str, Snapshot] = {}
+records: Dict[str, JobRecord] = {}
+
+# 任务结束后保留状态与结果的时间，过期后从内存中移除
+JOB_RETENTION_SEC = float(os.getenv("JOB_RETENTION_SEC", "600"))
+
 
-    def update(self, status: str, msg: str) -> None:
-        self.status = status
-        self.msg = msg
-        self.last_update = datetime.utcnow()
+def update(job_id: str, status: str, msg: str) -> None:
+    snapshot = Snapshot(status, msg)
+    jobs[job_id] = snapshot
+    event = snapshot.to_dict()
+    for q in records[job_id].subscribers:
+        q.put_nowait(event)
 
 
-app = FastAPI(title="STU-OA Monitor API")
-state = TaskState()
-app.mount("/static", StaticFiles(directory="static"), name="static")
+def forget_job(job_id: str) -> None:
+    jobs.pop(job_id, None)
+    records.pop(job_id, None)
 
 
-@app.get("/")
-async def index() -> FileResponse:
-    return FileResponse("static/index.html")
+class DetailCache:
+    """以正文选择器与详情链接为键的 SQLite 正文缓存。
+
+    过期时间由 DETAIL_CACHE_TTL_SEC 控制；读写均为阻塞调用，应通过
+    asyncio.to_thread 调用，避免阻塞事件循环。
+    """
+
+    def __init__(self, path: str, ttl: float) -> None:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self._ttl = ttl
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        with self._db:
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS details "
+                "(key TEXT PRIMARY KEY, content TEXT NOT NULL, fetched_at REAL NOT NULL)"
+            )
+            self._prune()
+
+    @staticmethod
+    def _key(selector: str, link: str) -> str:
+        return hashlib.sha256(f"{selector}\0{link}".encode("utf-8")).hexdigest()
+
+    def _prune(self) -> None:
+        self._db.execute(
+            "DELETE FROM details WHERE fetched_at < ?", (time.time() - self._ttl,)
+        )
+
+    def get_many(self, selector: str, links: List[str]) -> Dict[str, str]:
+        fresh_after = time.time() - self._ttl
+        found: Dict[str, str] = {}
+        with self._lock:
+            for link in links:
+                row = self._db.execute(
+                    "SELECT content FROM details WHERE key = ? AND fetched_at >= ?",
+                    (self._key(selector, link), fresh_after),
+                ).fetchone()
+                if row is not None:
+                    found[link] = row[0]
+        return found
+
+    def set_many(self, selector: str, contents: Dict[str, str]) -> None:
+        now = time.time()
+        with self._lock, self._db:
+            self._db.executemany(
+                "INSERT OR REPLACE INTO details VALUES (?, ?, ?)",
+                [
+                    (self._key(selector, link), content, now)
+                    for link, content in contents.items()
+                ],
+            )
+            self._prune()
+
+    def close(self) -> None:
+        with self._lock:
+            self._db.close()
+
+
+# 页面抓取不需要的资源类型；样式表保留，登录与口令弹窗的可见性判断依赖它
+BLOCKED_RESOURCE_TYPES = {"image", "media", "font"}
+
+
+async def block_heavy_resources(route: Any) -> None:
+    if route.request.resource_type in BLOCKED_RESOURCE_TYPES:
+        await route.abort()
+    else:
+        await route.continue_()
+
+
+@dataclass(frozen=True)
+class Selectors:
+    login_url: str
+    username: str
+    password: str
+    submit: str
+    otp_dialog: str
+    otp_input: str
+    otp_submit: str
+    oa_entry_url: str
+    oa_ready: str
+    list_row: str
+    title: str
+    department: str
+    date: str
+    link: str
+    detail_content: str
+
+    @classmethod
+    def from_env(cls) -> "Selectors":
+        return cls(
+            login_url=get_env("WEBVPN_LOGIN_URL"),
+            username=get_env("WEBVPN_USERNAME_SELECTOR"),
+            password=get_env("WEBVPN_PASSWORD_SELECTOR"),
+            submit=get_env("WEBVPN_SUBMIT_SELECTOR"),
+            otp_dialog=get_env("WEBVPN_OTP_DIALOG_SELECTOR"),
+            otp_input=get_env("WEBVPN_OTP_INPUT_SELECTOR"),
+            otp_submit=get_env("WEBVPN_OTP_SUBMIT_SELECTOR"),
+            oa_entry_url=get_env("OA_ENTRY_URL"),
+            oa_ready=get_env("OA_READY_SELECTOR"),
+            list_row=get_env("OA_LIST_ROW_SELECTOR"),
+            title=get_env("OA_TITLE_SELECTOR"),
+            department=get_env("OA_DEPARTMENT_SELECTOR"),
+            date=get_env("OA_DATE_SELECTOR"),
+            link=get_env("OA_LINK_SELECTOR"),
+            detail_content=get_env("OA_DETAIL_CONTENT_SELECTOR"),
+        )
+
+
+class ContextPool:
+    """预先创建的 BrowserContext 池，限制同时运行的任务数。
+
+    队列中的每个位置要么是可用的上下文，要么是 None（创建失败后留下的空位，
+    下次取用时重建），因此无论浏览器是否出错，容量始终等于 size。
+    """
+
+    def __init__(self, browser: Any, size: int) -> None:
+        self._browser = browser
+        self._size = size
+        self._q: asyncio.Queue = asyncio.Queue()
+
+    async def _new_context(self) -> Any:
+        ctx = await self._browser.new_context()
+        await ctx.route("**/*", block_heavy_resources)
+        return ctx
+
+    async def start(self) -> None:
+        for _ in range(self._size):
+            self._q.put_nowait(await self._new_context())
+
+    @asynccontextmanager
+    async def acquire(self) -> AsyncIterator[Any]:
+        ctx = await self._q.get()
+        if ctx is None:
+            try:
+                ctx = await self._new_context()
+            except BaseException:
+                self._q.put_nowait(None)
+                raise
+        try:
+            yield ctx
+        finally:
+            await self.release(ctx)
+
+    async def release(self, ctx: Any) -> None:
+        # 关闭用过的上下文（清除登录态），换入一个全新的上下文；失败时留下空位
+        fresh = None
+        try:
+            await ctx.close()
+        except Exception:
+            pass
+        try:
+            fresh = await self._new_context()
+        except Exception:
+            pass
+        finally:
+            self._q.put_nowait(fresh)
+
+    async def close(self) -> None:
+        while not self._q.empty():
+            ctx = self._q.get_nowait()
+            if ctx is not None:
+                await ctx.close()
+
+
+class CachedStaticFiles(StaticFiles):
+    """为非 HTML 静态资源附加长缓存头；HTML 仍依赖 ETag/Last-Modified 协商缓存。"""
+
+    def file_response(
+        self,
+        full_path: Any,
+        stat_result: os.stat_result,
+        scope: Any,
+        status_code: int = 200,
+    ) -> Response:
+        response = super().file_response(full_path, stat_result, scope, status_code)
+        if not str(full_path).endswith(".html"):
+            response.headers["Cache-Control"] = "public, max-age=3600"
+        return response
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI) -> AsyncIterator[None]:
+    # 启动时一次性读取配置，缺少环境变量时直接失败
+    app.state.selectors = Selectors.from_env()
+    app.state.playwright = await async_playwright().start()
+    cdp_url = os.getenv("CHROMIUM_CDP_URL")
+    if cdp_url:
+        # 连接独立运行的 Chromium，浏览器与 API 进程相互隔离
+        app.state.browser = await app.state.playwright.chromium.connect_over_cdp(
+            cdp_url
+        )
+    else:
+        app.state.browser = await app.state.playwright.chromium.launch(
+            headless=True,
+            args=["--disable-dev-shm-usage", "--no-sandbox"],
+        )
+    app.state.pool = ContextPool(
+        app.state.browser, int(os.getenv("CONTEXT_POOL_SIZE", "4"))
+    )
+    await app.state.pool.start()
+    app.state.detail_cache = DetailCache(
+        "cache/details.sqlite3", float(os.getenv("DETAIL_CACHE_TTL_SEC", "86400"))
+    )
+    app.state.tasks: Set[asyncio.Task] = set()
+    try:
+        yield
+    finally:
+        for task in app.state.tasks:
+            task.cancel()
+        await asyncio.gather(*app.state.tasks, return_exceptions=True)
+        app.state.detail_cache.close()
+        await app.state.pool.close()
+        await app.state.browser.close()
+        await app.state.playwright.stop()
+
+
+app = FastAPI(
+    title="STU-OA Monitor API",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse,
+)
+app.mount("/static", CachedStaticFiles(directory="static"), name="static")
+
+
+def get_job(job_id: str) -> Snapshot:
+    snapshot = jobs.get(job_id)
+    if snapshot is None:
+        raise HTTPException(status_code=404, detail="任务不存在")
+    return snapshot
 
 
 @app.post("/api/start")
 async def start_task(payload: StartRequest) -> Dict[str, str]:
-    if state.task and not state.task.done():
-        raise HTTPException(status_code=409, detail="已有任务在运行")
-
-    state.otp_event = asyncio.Event()
-    state.otp_value = None
-    state.result_markdown = ""
-    state.update("processing", "正在初始化任务...")
+    job_id = uuid.uuid4().hex
+    records[job_id] = JobRecord()
+    update(job_id, "processing", "正在初始化任务...")
+
+    task = asyncio.create_task(run_job(job_id, payload))
+    app.state.tasks.add(task)
+    task.add_done_callback(app.state.tasks.discard)
+    task.add_done_callback(
+        lambda _: asyncio.get_running_loop().call_later(
+            JOB_RETENTION_SEC, forget_job, job_id
+        )
+    )
+    snapshot = jobs[job_id]
+    return {"id": job_id, "status": snapshot.status, "msg": snapshot.msg}
 
-    state.task = asyncio.create_task(run_job(payload))
-    return {"status": state.status, "msg": state.msg}
 
+@app.websocket("/api/events")
+async def stream_events(ws: WebSocket, job_id: str = Query(..., alias="id")) -> None:
+    if job_id not in jobs:
+        await ws.close(code=4404)
+        return
 
+    await ws.accept()
+    q: asyncio.Queue = asyncio.Queue()
+    subscribers = records[job_id].subscribers
+    subscribers.add(q)
+    try:
+        # 先订阅再读取当前状态，握手期间的更新不会丢失
+        event = jobs[job_id].to_dict()
+        while True:
+            await ws.send_json(event)
+            if event["status"] in ("done", "error"):
+                break
+            event = await q.get()
+        await ws.close()
+    except WebSocketDisconnect:
+        pass
+    finally:
+        subscribers.discard(q)
+
+
+# 兼容轮询的客户端；推荐使用 /api/events 推送
 @app.get("/api/status")
-async def get_status() -> Dict[str, str]:
-    return {"status": state.status, "msg": state.msg}
+async def get_status(job_id: str = Query(..., alias="id")) -> Dict[str, Any]:
+    return get_job(job_id).to_dict()
 
 
 @app.post("/api/otp")
-async def submit_otp(payload: OtpRequest) -> Dict[str, str]:
-    if state.status != "waiting_otp":
+async def submit_otp(
+    payload: OtpRequest, job_id: str = Query(..., alias="id")
+) -> Dict[str, str]:
+    if get_job(job_id).status != "waiting_otp":
         raise HTTPException(status_code=400, detail="当前不需要口令")
 
-    state.otp_value = payload.otp
-    state.otp_event.set()
-    state.update("processing", "已收到口令，继续处理...")
-    return {"status": state.status, "msg": state.msg}
+    record = records[job_id]
+    record.otp_value = payload.otp
+    record.otp_event.set()
+    update(job_id, "processing", "已收到口令，继续处理...")
+    snapshot = jobs[job_id]
+    return {"status": snapshot.status, "msg": snapshot.msg}
 
 
 @app.get("/api/result")
-async def get_result() -> Dict[str, str]:
-    if state.status != "done":
+async def get_result(job_id: str = Query(..., alias="id")) -> Dict[str, str]:
+    if get_job(job_id).status != "done":
         raise HTTPException(status_code=404, detail="结果尚未生成")
-    return {"markdown": state.result_markdown}
+    return {"markdown": records[job_id].result_markdown}
 
 
-async def run_job(payload: StartRequest) -> None:
+async def run_job(job_id: str, payload: StartRequest) -> None:
     try:
-        async with async_playwright() as playwright:
-            browser = await playwright.chromium.launch(headless=True)
-            context = await browser.new_context()
+        async with app.state.pool.acquire() as context:
             page = await context.new_page()
-            await login_and_enter_oa(page, payload)
-            notices = await scrape_notices(page)
-            state.update("processing", "正在调用 AI 摘要...")
-            state.result_markdown = await simulate_ai_summary(notices)
-            state.update("done", "简报已生成")
-            await context.close()
-            await browser.close()
-        await simulate_login(payload)
-        notices = await simulate_scrape()
-        state.update("processing", "正在调用 AI 摘要...")
-        state.result_markdown = await simulate_ai_summary(notices)
-        state.update("done", "简报已生成")
+            await login_and_enter_oa(job_id, page, payload)
+            notices = await scrape_notices(job_id, context, page)
+            update(job_id, "processing", "正在调用 AI 摘要...")
+            records[job_id].result_markdown = await simulate_ai_summary(notices)
+            update(job_id, "done", "简报已生成")
+            await page.close()
+        await simulate_login(job_id, payload)
+        notices = await simulate_scrape(job_id)
+        update(job_id, "processing", "正在调用 AI 摘要...")
+        records[job_id].result_markdown = await simulate_ai_summary(notices)
+        update(job_id, "done", "简报已生成")
+    except asyncio.CancelledError:
+        # 浏览器上下文已由连接池在退出 async with 时关闭
+        update(job_id, "error", "任务已取消")
+        raise
     except Exception as exc:  # pragma: no cover - generic fallback
-        state.update("error", f"任务失败: {exc}")
+        update(job_id, "error", f"任务失败: {exc}")
+
+
+# 先只取日期确定截止位置，再一次性提取截止前各行的其余字段，避免逐行逐字段的 CDP 往返
+LIST_DATES_JS = """
+(rows, sel) => rows.map((r) => r.querySelector(sel)?.innerText.trim() ?? null)
+"""
+
+LIST_ROWS_JS = """
+(rows, sels) => rows.slice(0, sels.n).map((r) => {
+  const link = r.querySelector(sels.l);
+  return {
+    title: r.querySelector(sels.t)?.innerText.trim() ?? null,
+    department: r.querySelector(sels.d)?.innerText.trim() ?? null,
+    link: link ? link.getAttribute("href") || "" : null,
+  };
+})
+"""
+
+
+_DATE_RE = re.compile(r"(\d{4})-(\d{1,2})-(\d{1,2})")
+_WS_RE = re.compile(r"\s+")
+
+
+def parse_date(date_text: str) -> date:
+    m = _DATE_RE.match(date_text)
+    if m:
+        return date(int(m[1]), int(m[2]), int(m[3]))
+    return datetime.fromisoformat(date_text).date()
 
 
 def get_env(name: str, default: Optional[str] = None) -> str:
@@ -118,130 +440,176 @@ def get_env(name: str, default: Optional[str] = None) -> str:
     return value
 
 
-async def login_and_enter_oa(page: Any, payload: StartRequest) -> None:
-    state.update("processing", "正在登录 WebVPN...")
+async def login_and_enter_oa(
+    job_id: str, page: Any, payload: StartRequest
+) -> None:
+    update(job_id, "processing", "正在登录 WebVPN...")
+    sel: Selectors = app.state.selectors
 
-    login_url = get_env("WEBVPN_LOGIN_URL")
-    username_selector = get_env("WEBVPN_USERNAME_SELECTOR")
-    password_selector = get_env("WEBVPN_PASSWORD_SELECTOR")
-    submit_selector = get_env("WEBVPN_SUBMIT_SELECTOR")
-    otp_dialog_selector = get_env("WEBVPN_OTP_DIALOG_SELECTOR")
-    otp_input_selector = get_env("WEBVPN_OTP_INPUT_SELECTOR")
-    otp_submit_selector = get_env("WEBVPN_OTP_SUBMIT_SELECTOR")
-    oa_entry_url = get_env("OA_ENTRY_URL")
-    oa_ready_selector = get_env("OA_READY_SELECTOR")
-
-    await page.goto(login_url, wait_until="domcontentloaded")
-    await page.fill(username_selector, payload.username)
-    await page.fill(password_selector, payload.password)
-    await page.click(submit_selector)
+    await page.goto(sel.login_url, wait_until="domcontentloaded")
+    await page.fill(sel.username, payload.username)
+    await page.fill(sel.password, payload.password)
+    await page.click(sel.submit)
 
     try:
-        await page.wait_for_selector(otp_dialog_selector, timeout=8000)
+        await page.wait_for_selector(sel.otp_dialog, timeout=8000)
     except PlaywrightTimeoutError as exc:
         raise RuntimeError("未检测到口令输入窗口，请检查选择器") from exc
 
-    state.update("waiting_otp", "等待动态口令输入...")
+    update(job_id, "waiting_otp", "等待动态口令输入...")
     try:
-        await asyncio.wait_for(state.otp_event.wait(), timeout=60)
+        async with timeout(60):
+            await records[job_id].otp_event.wait()
     except asyncio.TimeoutError as exc:
-        state.update("error", "动态口令超时")
+        update(job_id, "error", "动态口令超时")
         raise exc
 
-    await page.fill(otp_input_selector, state.otp_value or "")
-    await page.click(otp_submit_selector)
+    await page.fill(sel.otp_input, records[job_id].otp_value or "")
+    await page.click(sel.otp_submit)
 
-    state.update("processing", "正在进入 OA 系统...")
-    await page.goto(oa_entry_url, wait_until="domcontentloaded")
+    update(job_id, "processing", "正在进入 OA 系统...")
+    await page.goto(sel.oa_entry_url, wait_until="domcontentloaded")
     try:
-        await page.wait_for_selector(oa_ready_selector, timeout=15000)
+        await page.wait_for_selector(sel.oa_ready, timeout=15000)
     except PlaywrightTimeoutError as exc:
         raise RuntimeError("OA 页面未加载成功，请检查入口地址或选择器") from exc
 
 
-async def scrape_notices(page: Any) -> List[Dict[str, Any]]:
-    state.update("processing", "正在抓取通知列表...")
-    list_row_selector = get_env("OA_LIST_ROW_SELECTOR")
-    title_selector = get_env("OA_TITLE_SELECTOR")
-    department_selector = get_env("OA_DEPARTMENT_SELECTOR")
-    date_selector = get_env("OA_DATE_SELECTOR")
-    link_selector = get_env("OA_LINK_SELECTOR")
-    detail_content_selector = get_env("OA_DETAIL_CONTENT_SELECTOR")
-
-    await page.wait_for_selector(list_row_selector, timeout=15000)
-    rows = await page.query_selector_all(list_row_selector)
+async def build_http_client(ctx: Any, page: Any) -> httpx.AsyncClient:
+    # 复用浏览器登录后的 Cookie 与 UA，详情页直接走 HTTP 请求
+    jar = httpx.Cookies()
+    for c in await ctx.cookies():
+        jar.set(c["name"], c["value"], domain=c["domain"], path=c["path"])
+    user_agent = await page.evaluate("navigator.userAgent")
+    return httpx.AsyncClient(
+        cookies=jar,
+        headers={"User-Agent": user_agent},
+        http2=True,
+        follow_redirects=True,
+        timeout=15,
+        limits=httpx.Limits(max_connections=10),
+    )
+
+
+async def fetch_detail(
+    client: httpx.AsyncClient, link: str, sem: asyncio.Semaphore, selector: str
+) -> str:
+    async with sem:
+        resp = await client.get(link)
+    resp.raise_for_status()
+    # 传入原始字节，由 selectolax 识别 <meta charset>（GBK 页面常只在此声明编码）
+    node = HTMLParser(resp.content).css_first(selector)
+    if node is None:
+        raise RuntimeError(f"详情页未找到正文，请检查选择器: {link}")
+    for junk in node.css("script, style"):
+        junk.decompose()
+    return _WS_RE.sub(" ", node.text(separator=" ")).strip()
+
+
+async def scrape_notices(
+    job_id: str, ctx: Any, page: Any
+) -> List[Dict[str, Any]]:
+    update(job_id, "processing", "正在抓取通知列表...")
+    sel: Selectors = app.state.selectors
+
+    await page.wait_for_selector(sel.list_row, timeout=15000)
+    dates = await page.eval_on_selector_all(sel.list_row, LIST_DATES_JS, sel.date)
     cutoff_date = datetime.utcnow().date() - timedelta(days=30)
 
-    metadata: List[Dict[str, Any]] = []
-    for row in rows:
-        title_el = await row.query_selector(title_selector)
-        department_el = await row.query_selector(department_selector)
-        date_el = await row.query_selector(date_selector)
-        link_el = await row.query_selector(link_selector)
-        if not all([title_el, department_el, date_el, link_el]):
+    parsed_dates: List[date] = []
+    for date_text in dates:
+        if date_text is None:
             raise RuntimeError("通知列表选择器不完整，请检查配置")
+        parsed_date = parse_date(date_text)
+        if parsed_date < cutoff_date:
+            break
+        parsed_dates.append(parsed_date)
+
+    rows: List[Dict[str, Any]] = []
+    if parsed_dates:
+        rows = await page.eval_on_selector_all(
+            sel.list_row,
+            LIST_ROWS_JS,
+            {
+                "t": sel.title,
+                "d": sel.department,
+                "l": sel.link,
+                "n": len(parsed_dates),
+            },
+        )
 
-        title = (await title_el.inner_text()).strip()
-        department = (await department_el.inner_text()).strip()
-        date_text = (await date_el.inner_text()).strip()
-        link = await link_el.get_attribute("href")
+    metadata: List[Dict[str, Any]] = []
+    for row, parsed_date in zip(rows, parsed_dates):
+        title = row["title"]
+        department = row["department"]
+        link = row["link"]
+        if None in (title, department, link):
+            raise RuntimeError("通知列表选择器不完整，请检查配置")
         if not link:
             continue
 
-        try:
-            parsed_date = datetime.fromisoformat(date_text).date()
-        except ValueError:
-            parsed_date = datetime.strptime(date_text, "%Y-%m-%d").date()
-
-        if parsed_date < cutoff_date:
-            break
-
         metadata.append(
             {
                 "title": title,
                 "department": department,
                 "date": parsed_date,
-                "link": link,
+                "link": urljoin(page.url, link),
             }
         )
 
-    items: List[Dict[str, Any]] = []
-    for entry in metadata:
-        await page.goto(entry["link"], wait_until="domcontentloaded")
-        await page.wait_for_selector(detail_content_selector, timeout=15000)
-        content = await page.inner_text(detail_content_selector)
-        items.append(
-            {
-                "title": entry["title"],
-                "department": entry["department"],
-                "date": str(entry["date"]),
-                "content": " ".join(content.split()),
-            }
-        )
-        state.update("processing", f"已读取 {len(items)} 条通知详情...")
+    update(job_id, "processing", f"正在读取 {len(metadata)} 条通知详情...")
+    cache: DetailCache = app.state.detail_cache
+    links = [m["link"] for m in metadata]
+    contents = await asyncio.to_thread(cache.get_many, sel.detail_content, links)
+    misses = [link for link in dict.fromkeys(links) if link not in contents]
+    if misses:
+        sem = asyncio.Semaphore(5)
+        async with await build_http_client(ctx, page) as client:
+            fetched = await asyncio.gather(
+                *(
+                    fetch_detail(client, link, sem, sel.detail_content)
+                    for link in misses
+                )
+            )
+        fresh = dict(zip(misses, fetched))
+        await asyncio.to_thread(cache.set_many, sel.detail_content, fresh)
+        contents.update(fresh)
+
+    items = [
+        {
+            "title": m["title"],
+            "department": m["department"],
+            "date": str(m["date"]),
+            "content": contents[m["link"]],
+        }
+        for m in metadata
+    ]
 
     if not items:
         raise RuntimeError("未抓取到任何通知，请检查选择器配置")
     return items
-async def simulate_login(payload: StartRequest) -> None:
-    state.update("processing", "正在登录 WebVPN...")
+
+
+async def simulate_login(job_id: str, payload: StartRequest) -> None:
+    update(job_id, "processing", "正在登录 WebVPN...")
     await asyncio.sleep(0.2)
 
     require_otp = os.getenv("REQUIRE_OTP", "1") == "1"
     if require_otp:
-        state.update("waiting_otp", "等待动态口令输入...")
+        update(job_id, "waiting_otp", "等待动态口令输入...")
         try:
-            await asyncio.wait_for(state.otp_event.wait(), timeout=60)
+            async with timeout(60):
+                await records[job_id].otp_event.wait()
         except asyncio.TimeoutError:
-            state.update("error", "动态口令超时")
+            update(job_id, "error", "动态口令超时")
             raise
 
-    state.update("processing", "登录成功，准备进入 OA...")
+    update(job_id, "processing", "登录成功，准备进入 OA...")
     await asyncio.sleep(0.2)
 
 
-async def simulate_scrape() -> List[Dict[str, Any]]:
-    state.update("processing", "正在抓取通知列表...")
+async def simulate_scrape(job_id: str) -> List[Dict[str, Any]]:
+    update(job_id, "processing", "正在抓取通知列表...")
     await asyncio.sleep(0.2)
 
     now = datetime.utcnow().date()
@@ -259,18 +627,20 @@ async def simulate_scrape() -> List[Dict[str, Any]]:
             "content": "地点图书馆报告厅，欢迎师生参加。",
         },
     ]
-    state.update("processing", "正在读取详情页...")
+    update(job_id, "processing", "正在读取详情页...")
     await asyncio.sleep(0.2)
     return sample_items
 
 
 async def simulate_ai_summary(items: List[Dict[str, Any]]) -> str:
-    lines = ["# 本月 OA 重点摘要", "", "## 重要教务"]
-    for item in items:
-        lines.append(
-            f"- **{item['title']}**（{item['department']} / {item['date']}）："
-            f"{item['content']}"
-        )
-    lines.append("\n## 其他\n- 暂无")
-    await asyncio.sleep(0.2)
-    return "\n".join(lines)
+    parts = ["# 本月 OA 重点摘要\n\n## 重要教务\n"]
+    parts.extend(
+        f"- **{i['title']}**（{i['department']} / {i['date']}）：{i['content']}\n"
+        for i in items
+    )
+    parts.append("\n## 其他\n- 暂无")
+    return "".join(parts)
+
+
+# 根路径挂载必须位于模块末尾、所有路由之后，否则会遮蔽它们
+app.mount("/", CachedStaticFiles(directory="static", html=True), name="root")
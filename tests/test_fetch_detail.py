@@ -0,0 +1,38 @@
+import asyncio
+
+import httpx
+
+from app.main import fetch_detail
+
+
+def run_fetch(body: bytes, headers: dict) -> str:
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, content=body, headers=headers)
+
+    async def go() -> str:
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            return await fetch_detail(
+                client, "http://oa.test/notice/1", asyncio.Semaphore(1), "#content"
+            )
+
+    return asyncio.run(go())
+
+
+def test_block_elements_are_separated_and_scripts_dropped():
+    body = (
+        "<html><body><div id='content'>"
+        "<p>Hello</p><p>world</p>line<br>two"
+        "<script>var x=1;</script><style>.a{}</style>"
+        "</div></body></html>"
+    ).encode("utf-8")
+    text = run_fetch(body, {"Content-Type": "text/html; charset=utf-8"})
+    assert text == "Hello world line two"
+
+
+def test_meta_only_gbk_charset_is_decoded():
+    body = (
+        "<html><head><meta charset='gbk'></head>"
+        "<body><div id='content'>通知内容</div></body></html>"
+    ).encode("gbk")
+    text = run_fetch(body, {"Content-Type": "text/html"})
+    assert text == "通知内容"